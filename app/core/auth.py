@@ -1,10 +1,16 @@
 import os
-from datetime import datetime, timedelta, timezone
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import time
+import hashlib
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional
+import bcrypt
+import jwt
+from jwt.exceptions import InvalidTokenError as JWTError
 from dotenv import load_dotenv
-from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
-from passlib.context import CryptContext
+from itsdangerous import URLSafeTimedSerializer, BadData
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -15,65 +21,161 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Optional hashing latency target; when set, rounds are calibrated on startup.
+BCRYPT_TARGET_MS = os.getenv("BCRYPT_TARGET_MS")
 
 RESET_PASSWORD_SALT = "password-reset-salt"
 TOKEN_EXPIRATION_SECONDS = 3600  # 1 hour
-serializer = URLSafeTimedSerializer(SECRET_KEY)
+# Salt and signer settings are fixed once here instead of passed on every call.
+serializer = URLSafeTimedSerializer(
+    SECRET_KEY,
+    salt=RESET_PASSWORD_SALT,
+    signer_kwargs={"digest_method": hashlib.sha256, "key_derivation": "hmac"},
+)
+
+# Decoded access tokens keyed by the raw token, least recently used first.
+JWT_CACHE_MAXSIZE = 10000
+_jwt_cache: OrderedDict[str, dict] = OrderedDict()
+
+# bcrypt releases the GIL, so hashing in worker threads runs in parallel
+# instead of blocking the event loop for the whole cost of a hash.
+password_executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+# Hash checked when no user matches a login, created on first use.
+_dummy_password_hash: Optional[str] = None
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    except ValueError:
+        # Malformed or non-bcrypt hash stored for the user.
+        return False
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(BCRYPT_ROUNDS)).decode()
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a stored bcrypt hash was made with a different cost than BCRYPT_ROUNDS.
+
+    Args:
+        hashed_password (str): The stored hash, e.g. "$2b$12$...".
+
+    Returns:
+        bool: True if the hash should be replaced; False if it is current or malformed.
+    """
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return False
+    return int(parts[2]) != BCRYPT_ROUNDS
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float, min_rounds: int = 10, max_rounds: int = 16
+) -> int:
+    """
+    Find the largest bcrypt cost whose hash time stays under a target latency.
 
+    Args:
+        target_ms (float): The maximum acceptable time for one hash, in milliseconds.
+        min_rounds (int): The lowest cost to return. Defaults to 10.
+        max_rounds (int): The highest cost to try. Defaults to 16.
 
-from datetime import datetime, timedelta, timezone
+    Returns:
+        int: The selected cost, never lower than min_rounds.
+    """
+    rounds = min_rounds
+    for candidate in range(min_rounds, max_rounds + 1):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration", bcrypt.gensalt(candidate))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms > target_ms:
+            break
+        rounds = candidate
+    return rounds
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_executor, verify_password, plain_password, hashed_password
+    )
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, get_password_hash, password)
+
+
+async def get_dummy_password_hash() -> str:
+    """
+    Return a throwaway hash at the current cost for logins with an unknown email.
+
+    Checking the password against it makes a failed lookup take as long as a
+    wrong password, so response times do not reveal which emails are registered.
+
+    Returns:
+        str: The bcrypt hash of a random password.
+    """
+    global _dummy_password_hash
+    if _dummy_password_hash is None:
+        _dummy_password_hash = await hash_password_async(os.urandom(16).hex())
+    return _dummy_password_hash
 
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (
-        expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    lifetime = (
+        expires_delta.total_seconds()
+        if expires_delta
+        else ACCESS_TOKEN_EXPIRE_MINUTES * 60
     )
-    to_encode.update({"exp": expire})
+    # JWT "exp" is a NumericDate, so an epoch int avoids datetime conversions.
+    to_encode["exp"] = int(time.time() + lifetime)
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
 def decode_access_token(token: str):
+    payload = _jwt_cache.get(token)
+    if payload is not None:
+        if payload["exp"] > time.time():
+            _jwt_cache.move_to_end(token)
+            return payload
+        del _jwt_cache[token]
+        return None
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         return None
+    # Only tokens with an expiry are cached so entries never outlive the token.
+    if "exp" in payload:
+        _jwt_cache[token] = payload
+        if len(_jwt_cache) > JWT_CACHE_MAXSIZE:
+            _jwt_cache.popitem(last=False)
+    return payload
     
 def generate_reset_token(email: str) -> str:
-    return serializer.dumps(email, salt=RESET_PASSWORD_SALT)
+    return serializer.dumps(email)
 
-def verify_reset_token(token: str, expiration: int = TOKEN_EXPIRATION_SECONDS) -> str:
+def verify_reset_token(
+    token: str, expiration: int = TOKEN_EXPIRATION_SECONDS
+) -> Optional[str]:
+    # Expired, tampered and malformed tokens are deliberately indistinguishable.
     try:
-        email = serializer.loads(token, salt=RESET_PASSWORD_SALT, max_age=expiration)
-    except SignatureExpired:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="The reset token has expired."
-        )
-    except BadSignature:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid reset token."
-        )
-    return email
+        return serializer.loads(token, max_age=expiration)
+    except BadData:
+        return None
 
 async def update_user_password(db: AsyncSession, email: str, new_password: str):
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalars().first()
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    user.hashed_password = get_password_hash(new_password)
+    user.hashed_password = await hash_password_async(new_password)
+    # expire_on_commit=False keeps the instance loaded; nothing else changed the row.
     await db.commit()
-    await db.refresh(user)
     return user
@@ -0,0 +1,55 @@
+import os
+import logging
+from email.message import EmailMessage
+import aiosmtplib
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+SMTP_HOST = os.getenv("SMTP_HOST")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_FROM = os.getenv("SMTP_FROM", "no-reply@contacts.local")
+
+
+async def send_reset_email(email: str, reset_token: str):
+    """
+    Send a password reset token to a user by email.
+
+    Without SMTP_HOST configured, the token is logged instead so local
+    development keeps working.
+
+    Args:
+        email (str): The recipient's email address.
+        reset_token (str): The password reset token.
+
+    Returns:
+        None
+    """
+    if not SMTP_HOST:
+        logger.info("Password reset token for %s: %s", email, reset_token)
+        return
+
+    message = EmailMessage()
+    message["From"] = SMTP_FROM
+    message["To"] = email
+    message["Subject"] = "Password reset"
+    message.set_content(
+        f"Use this token to reset your password: {reset_token}\n"
+        "If you did not request a password reset, ignore this email."
+    )
+    try:
+        await aiosmtplib.send(
+            message,
+            hostname=SMTP_HOST,
+            port=SMTP_PORT,
+            username=SMTP_USERNAME,
+            password=SMTP_PASSWORD,
+            start_tls=True,
+        )
+    except aiosmtplib.SMTPException:
+        # Runs as a background task, so there is no response left to fail.
+        logger.exception("Failed to send password reset email to %s", email)
@@ -0,0 +1,75 @@
+import os
+import logging
+from fastapi import Depends, HTTPException, Request, status
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ATTEMPTS = int(os.getenv("RATE_LIMIT_ATTEMPTS", 5))
+RATE_LIMIT_WINDOW_SECONDS = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", 60))
+
+# INCR and EXPIRE in one script so a counter can never be left without a TTL.
+_RATE_LIMIT_SCRIPT = """
+local current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return current
+"""
+
+
+async def rate_limit(
+    request: Request, redis: Redis, key_prefix: str, limit: int, window: int
+):
+    """
+    Count a request against a fixed-window limit for the client's IP address.
+
+    Args:
+        request (Request): The incoming request.
+        redis (Redis): The asynchronous Redis connection.
+        key_prefix (str): The name of the bucket, e.g. the endpoint being protected.
+        limit (int): The number of requests allowed per window.
+        window (int): The window length in seconds.
+
+    Raises:
+        HTTPException: If the client has exceeded the limit for the current window.
+    """
+    client_host = request.client.host if request.client else "unknown"
+    key = f"ratelimit:{key_prefix}:{client_host}"
+    try:
+        hits = await redis.eval(_RATE_LIMIT_SCRIPT, 1, key, window)
+    except RedisError:
+        # Fail open: an unavailable Redis should not lock everyone out.
+        logger.warning("Rate limit check skipped for %s", key, exc_info=True)
+        return
+    if hits > limit:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(window)},
+        )
+
+
+def rate_limiter(
+    key_prefix: str,
+    limit: int = RATE_LIMIT_ATTEMPTS,
+    window: int = RATE_LIMIT_WINDOW_SECONDS,
+):
+    """
+    Build a FastAPI dependency that applies rate_limit to a route.
+
+    Args:
+        key_prefix (str): The name of the bucket shared by the routes using the dependency.
+        limit (int): The number of requests allowed per window.
+        window (int): The window length in seconds.
+
+    Returns:
+        Callable: The dependency to pass to Depends.
+    """
+
+    async def dependency(request: Request, redis: Redis = Depends(get_redis)):
+        await rate_limit(request, redis, key_prefix, limit, window)
+
+    return dependency
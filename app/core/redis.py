@@ -1,9 +1,22 @@
+import os
 from redis.asyncio import Redis
-from typing import AsyncGenerator
-
-async def get_redis() -> AsyncGenerator[Redis, None]:
-    redis_client = Redis.from_url("redis://localhost")
-    try:
-        yield redis_client
-    finally:
-        await redis_client.close()
\ No newline at end of file
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REDIS_URL = os.getenv(
+    "REDIS_URL",
+    f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', 6379)}",
+)
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 100))
+
+# One client for the whole process; connections are opened lazily from its pool.
+redis_client = Redis.from_url(REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS)
+
+
+async def get_redis() -> Redis:
+    return redis_client
+
+
+async def close_redis():
+    await redis_client.aclose()
@@ -1,19 +1,22 @@
 """
 This module provides CRUD (Create, Read, Update, Delete) operations for managing
-contacts in the database. It also includes functions to search contacts and to fetch
-contacts with upcoming birthdays.
+contacts in the database. It also includes functions to list contacts with optional
+search filters and to fetch contacts with upcoming birthdays.
 """
 import logging
+from sqlalchemy import update, delete, lambda_stmt
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+from redis.asyncio import Redis
 from app.models.models import Contact
 from app.schemas.schemas import ContactCreate, ContactUpdate
 from datetime import datetime, timedelta
+from typing import Optional
 
-
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+UPCOMING_BIRTHDAYS_CACHE_TTL_SECONDS = 300
 
 async def get_contact(db: AsyncSession, contact_id: int):
     """
@@ -26,10 +29,9 @@ async def get_contact(db: AsyncSession, contact_id: int):
     Returns:
         Contact: The contact object if found; otherwise, None.
     """
-    logger.info(f"Fetching contact with id: {contact_id}")
-    result = await db.execute(select(Contact).where(Contact.id == contact_id))
-    contact = result.scalars().first()
-    logger.info(f"Contact fetched: {contact}")
+    logger.info("Fetching contact with id: %s", contact_id)
+    contact = await db.get(Contact, contact_id)
+    logger.info("Contact fetched: %s", contact)
     return contact
 
 
@@ -45,10 +47,60 @@ async def get_contacts(db: AsyncSession, skip: int = 0, limit: int = 100):
     Returns:
         list[Contact]: A list of contacts.
     """
-    logger.info(f"Fetching contacts with skip: {skip}, limit: {limit}")
-    result = await db.execute(select(Contact).offset(skip).limit(limit))
+    return await list_contacts(db, skip, limit)
+
+
+async def list_contacts(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    first_name: str = None,
+    last_name: str = None,
+    email: str = None,
+):
+    """
+    Retrieve a page of contacts, optionally filtered by first name, last name, or email.
+
+    Filters use case-insensitive substring matching and are combined with AND.
+    Filtering and pagination both happen in a single SQL query.
+
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        skip (int): The number of records to skip (for pagination). Defaults to 0.
+        limit (int): The maximum number of records to retrieve. Defaults to 100.
+        first_name (str, optional): The first name to search for. Defaults to None.
+        last_name (str, optional): The last name to search for. Defaults to None.
+        email (str, optional): The email to search for. Defaults to None.
+
+    Returns:
+        list[Contact]: A list of contacts that match the filters.
+    """
+    logger.info(
+        "Listing contacts with skip: %s, limit: %s, first_name: %s, last_name: %s, email: %s",
+        skip,
+        limit,
+        first_name,
+        last_name,
+        email,
+    )
+    # Each combination of filters is compiled once and cached by lambda_stmt.
+    # raiseload("*") turns a lazy load during serialization into an error, so a
+    # future relationship must be eager-loaded here instead of causing N+1 queries.
+    query = lambda_stmt(lambda: select(Contact).options(raiseload("*")))
+    if first_name:
+        first_name_pattern = f"%{first_name}%"
+        query += lambda q: q.where(Contact.first_name.ilike(first_name_pattern))
+    if last_name:
+        last_name_pattern = f"%{last_name}%"
+        query += lambda q: q.where(Contact.last_name.ilike(last_name_pattern))
+    if email:
+        email_pattern = f"%{email}%"
+        query += lambda q: q.where(Contact.email.ilike(email_pattern))
+    # Order by primary key so pages are stable between requests.
+    query += lambda q: q.order_by(Contact.id).offset(skip).limit(limit)
+    result = await db.execute(query)
     contacts = result.scalars().all()
-    logger.info(f"Contacts fetched: {contacts}")
+    logger.info("Contacts fetched: %s", contacts)
     return contacts
 
 
@@ -63,12 +115,12 @@ async def create_contact(db: AsyncSession, contact: ContactCreate):
     Returns:
         Contact: The created contact object.
     """
-    logger.info(f"Creating contact: {contact}")
+    logger.info("Creating contact: %s", contact)
     db_contact = Contact(**contact.model_dump())
     db.add(db_contact)
     await db.commit()
     await db.refresh(db_contact)
-    logger.info(f"Contact created: {db_contact}")
+    logger.info("Contact created: %s", db_contact)
     return db_contact
 
 
@@ -86,17 +138,26 @@ async def update_contact(
     Returns:
         Contact: The updated contact object, or None if the contact does not exist.
     """
-    logger.info(f"Updating contact with id: {contact_id}")
-    db_contact = await get_contact(db, contact_id)
+    logger.info("Updating contact with id: %s", contact_id)
+    values = contact_update.model_dump(exclude_unset=True)
+    if not values:
+        return await get_contact(db, contact_id)
+    # A single UPDATE ... RETURNING replaces the SELECT, UPDATE and refresh.
+    stmt = (
+        update(Contact)
+        .where(Contact.id == contact_id)
+        .values(**values)
+        .returning(Contact)
+        # Overwrite an instance already in the identity map with the new row.
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    db_contact = result.scalars().first()
     if not db_contact:
-        logger.warning(f"Contact with id: {contact_id} not found")
+        logger.warning("Contact with id: %s not found", contact_id)
         return None
-    for var, value in contact_update.model_dump(exclude_unset=True).items():
-        setattr(db_contact, var, value)
-    db.add(db_contact)
     await db.commit()
-    await db.refresh(db_contact)
-    logger.info(f"Contact updated: {db_contact}")
+    logger.info("Contact updated: %s", db_contact)
     return db_contact
 
 
@@ -111,67 +172,92 @@ async def delete_contact(db: AsyncSession, contact_id: int):
     Returns:
         Contact: The deleted contact object, or None if the contact was not found.
     """
-    logger.info(f"Deleting contact with id: {contact_id}")
-    db_contact = await get_contact(db, contact_id)
+    logger.info("Deleting contact with id: %s", contact_id)
+    stmt = (
+        delete(Contact)
+        .where(Contact.id == contact_id)
+        .returning(Contact)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    db_contact = result.scalars().first()
     if not db_contact:
-        logger.warning(f"Contact with id: {contact_id} not found")
+        logger.warning("Contact with id: %s not found", contact_id)
         return None
-    await db.delete(db_contact)
     await db.commit()
-    logger.info(f"Contact deleted: {db_contact}")
+    logger.info("Contact deleted: %s", db_contact)
     return db_contact
 
 
-async def search_contacts(
-    db: AsyncSession, first_name: str = None, last_name: str = None, email: str = None
-):
+async def get_contacts_with_upcoming_birthdays(db: AsyncSession):
     """
-    Search contacts by first name, last name, or email using case-insensitive matching.
+    Retrieve contacts with birthdays occurring in the next 7 days.
 
     Args:
         db (AsyncSession): The asynchronous database session.
-        first_name (str, optional): The first name to search for. Defaults to None.
-        last_name (str, optional): The last name to search for. Defaults to None.
-        email (str, optional): The email to search for. Defaults to None.
 
     Returns:
-        list[Contact]: A list of contact objects that match the search criteria.
+        list[Contact]: A list of contacts with upcoming birthdays.
     """
-    logger.info(
-        f"Searching contacts with first_name: {first_name}, last_name: {last_name}, email: {email}"
+    logger.info("Fetching contacts with upcoming birthdays")
+    today = datetime.today().date()
+    upcoming = today + timedelta(days=7)
+    query = lambda_stmt(
+        lambda: select(Contact)
+        .options(raiseload("*"))
+        .where(Contact.birthday >= today)
+        .where(Contact.birthday <= upcoming)
     )
-    query = select(Contact)
-    if first_name:
-        query = query.where(Contact.first_name.ilike(f"%{first_name}%"))
-    if last_name:
-        query = query.where(Contact.last_name.ilike(f"%{last_name}%"))
-    if email:
-        query = query.where(Contact.email.ilike(f"%{email}%"))
     result = await db.execute(query)
     contacts = result.scalars().all()
-    logger.info(f"Contacts found: {contacts}")
+    logger.info("Contacts with upcoming birthdays: %s", contacts)
     return contacts
 
 
-async def get_contacts_with_upcoming_birthdays(db: AsyncSession):
+def _upcoming_birthdays_key() -> str:
+    # Keyed by date so yesterday's window is never served after midnight.
+    return f"contacts:upcoming_birthdays:{datetime.today().date().isoformat()}"
+
+
+async def get_upcoming_birthdays_from_redis(redis: Redis) -> Optional[bytes]:
     """
-    Retrieve contacts with birthdays occurring in the next 7 days.
+    Retrieve today's cached upcoming-birthdays response from Redis.
 
     Args:
-        db (AsyncSession): The asynchronous database session.
+        redis (Redis): The asynchronous Redis connection.
 
     Returns:
-        list[Contact]: A list of contacts with upcoming birthdays.
+        bytes: The JSON-encoded list of contacts if cached; otherwise, None.
     """
-    logger.info("Fetching contacts with upcoming birthdays")
-    today = datetime.today().date()
-    upcoming = today + timedelta(days=7)
-    query = (
-        select(Contact)
-        .where(Contact.birthday >= today)
-        .where(Contact.birthday <= upcoming)
+    return await redis.get(_upcoming_birthdays_key())
+
+
+async def store_upcoming_birthdays_in_redis(redis: Redis, contacts_json: bytes):
+    """
+    Cache today's upcoming-birthdays response in Redis.
+
+    Args:
+        redis (Redis): The asynchronous Redis connection.
+        contacts_json (bytes): The JSON-encoded list of contacts.
+
+    Returns:
+        None
+    """
+    await redis.set(
+        _upcoming_birthdays_key(),
+        contacts_json,
+        ex=UPCOMING_BIRTHDAYS_CACHE_TTL_SECONDS,
     )
-    result = await db.execute(query)
-    contacts = result.scalars().all()
-    logger.info(f"Contacts with upcoming birthdays: {contacts}")
-    return contacts
+
+
+async def delete_upcoming_birthdays_from_redis(redis: Redis):
+    """
+    Evict today's cached upcoming-birthdays response after contacts change.
+
+    Args:
+        redis (Redis): The asynchronous Redis connection.
+
+    Returns:
+        None
+    """
+    await redis.delete(_upcoming_birthdays_key())
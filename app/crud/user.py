@@ -1,15 +1,35 @@
 import logging
-import json
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import lambda_stmt, update
 from sqlalchemy.future import select
 from app.models.user import User
-from app.schemas.user import UserCreate
-from app.core.auth import get_password_hash
+from app.schemas.user import UserCreate, UserOut
+from app.core.auth import hash_password_async
 from typing import Optional
 from redis.asyncio import Redis
 
 logger = logging.getLogger(__name__)
 
+USER_CACHE_TTL_SECONDS = 300
+
+
+def _user_cache_key(email: str) -> str:
+    """
+    Build the Redis key for a cached user.
+
+    The v2 prefix holds the UserOut JSON. Older entries under user:{email}
+    contained the password hash and must never be served, so they are left to
+    expire rather than read.
+
+    Args:
+        email (str): The email address of the user.
+
+    Returns:
+        str: The Redis key.
+    """
+    return f"user:v2:{email}"
+
 async def get_user_by_email(db: AsyncSession, email: str):
     """
     Retrieve a user by email from the database.
@@ -21,7 +41,8 @@ async def get_user_by_email(db: AsyncSession, email: str):
     Returns:
         User: The user object if found; otherwise, None.
     """
-    result = await db.execute(select(User).where(User.email == email))
+    query = lambda_stmt(lambda: select(User).where(User.email == email))
+    result = await db.execute(query)
     return result.scalars().first()
 
 async def get_user_by_email_from_redis(redis: Redis, email: str) -> Optional[User]:
@@ -35,17 +56,54 @@ async def get_user_by_email_from_redis(redis: Redis, email: str) -> Optional[Use
     Returns:
         User: The user object if found; otherwise, None.
     """
-    user_key = f"user:{email}"
+    user_key = _user_cache_key(email)
     
     user_json = await redis.get(user_key)
     if user_json is None:
         return None
 
-    user_data = json.loads(user_json)
+    user_data = orjson.loads(user_json)
     
     return User(**user_data)    
 
 
+async def get_user_json_from_redis(redis: Redis, email: str) -> Optional[bytes]:
+    """
+    Retrieve a cached user's serialized UserOut JSON from Redis without decoding it.
+
+    Args:
+        redis (Redis): The asynchronous Redis connection.
+        email (str): The email address of the user to retrieve.
+
+    Returns:
+        bytes: The JSON-encoded user data if cached; otherwise, None.
+    """
+    return await redis.get(_user_cache_key(email))
+
+
+async def get_user_cached(db: AsyncSession, redis: Redis, email: str) -> Optional[User]:
+    """
+    Retrieve a user by email, reading from Redis first and falling back to the database.
+
+    A user loaded from the database is stored in Redis for subsequent lookups.
+
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        redis (Redis): The asynchronous Redis connection.
+        email (str): The email address of the user to retrieve.
+
+    Returns:
+        User: The user object if found; otherwise, None.
+    """
+    user = await get_user_by_email_from_redis(redis, email)
+    if user is not None:
+        return user
+    user = await get_user_by_email(db, email)
+    if user is not None:
+        await store_in_redis(redis, user)
+    return user
+
+
 async def create_user(db: AsyncSession, user: UserCreate):
     """
     Create a new user in the database.
@@ -57,18 +115,49 @@ async def create_user(db: AsyncSession, user: UserCreate):
     Returns:
         User: The created user object.
     """
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password_async(user.password)
     db_user = User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
     await db.commit()
     await db.refresh(db_user)
-    logger.info(f"Created user: {db_user.email}")
+    logger.info("Created user: %s", db_user.email)
     return db_user
 
+
+async def update_user_avatar(db: AsyncSession, email: str, avatar_url: str) -> Optional[User]:
+    """
+    Set a user's avatar URL with a single UPDATE ... RETURNING statement.
+
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        email (str): The email address of the user to update.
+        avatar_url (str): The new avatar URL.
+
+    Returns:
+        User: The updated user object, or None if the user does not exist.
+    """
+    stmt = (
+        update(User)
+        .where(User.email == email)
+        .values(avatar_url=avatar_url)
+        .returning(User)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    user = result.scalars().first()
+    if user is None:
+        return None
+    await db.commit()
+    return user
+
 async def store_in_redis(redis: Redis, user: User):
     """
     Store a user object in Redis.
 
+    The value is the UserOut JSON, so it can be sent as a response body as is,
+    and the password hash stays in the database. The value and its TTL are
+    written by a single SET command.
+
     Args:
         redis (Redis): The asynchronous Redis connection.
         user (User): The user object to store in Redis.
@@ -76,17 +165,20 @@ async def store_in_redis(redis: Redis, user: User):
     Returns:
         None
     """
-    user_data = {
-        "id": user.id,
-        "email": user.email,
-        "hashed_password": user.hashed_password,
-        "is_active": bool(user.is_active),
-        "is_verified": bool(user.is_verified),
-        "avatar_url": user.avatar_url,
-        "role": user.role
-    }
-    
-    user_data_json = json.dumps(user_data)
+    user_data_json = UserOut.model_validate(user).model_dump_json().encode()
+    user_key = _user_cache_key(user.email)
+    await redis.set(user_key, user_data_json, ex=USER_CACHE_TTL_SECONDS)
+
+
+async def delete_from_redis(redis: Redis, email: str):
+    """
+    Remove a cached user from Redis.
 
-    user_key = f"user:{user.email}"
-    await redis.set(user_key, user_data_json, ex=3600)
+    Args:
+        redis (Redis): The asynchronous Redis connection.
+        email (str): The email address of the user to evict.
+
+    Returns:
+        None
+    """
+    await redis.delete(_user_cache_key(email))
@@ -2,7 +2,9 @@ import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core import auth
 from app.core.database import engine
+from app.core.redis import close_redis
 from app.models.models import Base
 from app.models.user import User  # noqa: F401
 from app.routes.routes import router as contacts_router
@@ -17,11 +19,15 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     logger.info("Starting up the application...")
+    if auth.BCRYPT_TARGET_MS:
+        auth.BCRYPT_ROUNDS = auth.calibrate_bcrypt_rounds(float(auth.BCRYPT_TARGET_MS))
+        logger.info("Calibrated bcrypt rounds: %s", auth.BCRYPT_ROUNDS)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     logger.info("Application startup complete.")
     yield
     logger.info("Shutting down the application...")
+    await close_redis()
 
 
 app = FastAPI(title="Contacts API", lifespan=lifespan)
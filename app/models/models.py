@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Text
+from sqlalchemy import Column, Integer, String, Date, Text, Index, DDL, event
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -18,11 +18,28 @@ class Contact(Base):
         additional_data (str): Any additional information about the contact.
     """
     __tablename__ = "contacts"
+    # Trigram indexes let the leading-wildcard ILIKE searches use an index scan.
+    __table_args__ = tuple(
+        Index(
+            f"ix_contacts_{column}_trgm",
+            column,
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+        for column in ("first_name", "last_name", "email")
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False, index=True)
     phone = Column(String, nullable=False)
-    birthday = Column(Date, nullable=False)
+    birthday = Column(Date, nullable=False, index=True)
     additional_data = Column(Text, nullable=True)
+
+
+event.listen(
+    Contact.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
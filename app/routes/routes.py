@@ -12,13 +12,16 @@ Routes:
 
 Dependencies:
     - get_db: Provides a database session for route handlers.
+    - get_redis: Provides the Redis client used to cache upcoming birthdays.
 """
 
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from redis.asyncio import Redis
 import logging
 
-from app.core import database
+from app.core.database import get_db
+from app.core.redis import get_redis
 from app.crud import crud
 from app.schemas import schemas
 
@@ -26,12 +29,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-# Dependency to get the database session
-async def get_db():
-    async with database.async_session() as session:
-        yield session
-
-
 @router.get("/")
 async def read_root():
     """
@@ -45,7 +42,9 @@ async def read_root():
 
 @router.post("/contacts/", response_model=schemas.Contact)
 async def create_contact(
-    contact: schemas.ContactCreate, db: AsyncSession = Depends(get_db)
+    contact: schemas.ContactCreate,
+    db: AsyncSession = Depends(get_db, scope="function"),
+    redis: Redis = Depends(get_redis),
 ):
     """
     Create a new contact.
@@ -53,12 +52,14 @@ async def create_contact(
     Args:
         contact (schemas.ContactCreate): The contact data to create.
         db (AsyncSession): The database session.
+        redis (Redis): The Redis client.
 
     Returns:
         schemas.Contact: The created contact.
     """
     logger.info("Received request to create contact: %s", contact)
     db_contact = await crud.create_contact(db, contact)
+    await crud.delete_upcoming_birthdays_from_redis(redis)
     return db_contact
 
 
@@ -66,7 +67,7 @@ async def create_contact(
 async def read_contacts(
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     first_name: str = Query(None),
     last_name: str = Query(None),
     email: str = Query(None),
@@ -85,16 +86,15 @@ async def read_contacts(
     Returns:
         list[schemas.Contact]: A list of contacts.
     """
-    if first_name or last_name or email:
-        contacts = await crud.search_contacts(db, first_name, last_name, email)
-    else:
-        contacts = await crud.get_contacts(db, skip, limit)
+    contacts = await crud.list_contacts(db, skip, limit, first_name, last_name, email)
     logger.info("Fetched contacts: %s", contacts)
     return contacts
 
 
 @router.get("/contacts/{contact_id}", response_model=schemas.Contact)
-async def read_contact(contact_id: int, db: AsyncSession = Depends(get_db)):
+async def read_contact(
+    contact_id: int, db: AsyncSession = Depends(get_db, scope="function")
+):
     """
     Retrieve a specific contact by ID.
 
@@ -115,7 +115,10 @@ async def read_contact(contact_id: int, db: AsyncSession = Depends(get_db)):
 
 @router.put("/contacts/{contact_id}", response_model=schemas.Contact)
 async def update_contact(
-    contact_id: int, contact: schemas.ContactUpdate, db: AsyncSession = Depends(get_db)
+    contact_id: int,
+    contact: schemas.ContactUpdate,
+    db: AsyncSession = Depends(get_db, scope="function"),
+    redis: Redis = Depends(get_redis),
 ):
     """
     Update a specific contact by ID.
@@ -124,6 +127,7 @@ async def update_contact(
         contact_id (int): The ID of the contact to update.
         contact (schemas.ContactUpdate): The updated contact data.
         db (AsyncSession): The database session.
+        redis (Redis): The Redis client.
 
     Returns:
         schemas.Contact: The updated contact.
@@ -132,18 +136,24 @@ async def update_contact(
     if updated is None:
         logger.warning("Contact not found for update: %s", contact_id)
         raise HTTPException(status_code=404, detail="Contact not found")
+    await crud.delete_upcoming_birthdays_from_redis(redis)
     logger.info("Updated contact: %s", updated)
     return updated
 
 
 @router.delete("/contacts/{contact_id}", response_model=schemas.Contact)
-async def delete_contact(contact_id: int, db: AsyncSession = Depends(get_db)):
+async def delete_contact(
+    contact_id: int,
+    db: AsyncSession = Depends(get_db, scope="function"),
+    redis: Redis = Depends(get_redis),
+):
     """
     Delete a specific contact by ID.
 
     Args:
         contact_id (int): The ID of the contact to delete.
         db (AsyncSession): The database session.
+        redis (Redis): The Redis client.
 
     Returns:
         schemas.Contact: The deleted contact.
@@ -152,24 +162,40 @@ async def delete_contact(contact_id: int, db: AsyncSession = Depends(get_db)):
     if deleted is None:
         logger.warning("Contact not found for deletion: %s", contact_id)
         raise HTTPException(status_code=404, detail="Contact not found")
+    await crud.delete_upcoming_birthdays_from_redis(redis)
     logger.info("Deleted contact: %s", deleted)
     return deleted
 
 
 @router.get("/contacts/birthdays/upcoming", response_model=list[schemas.Contact])
-async def upcoming_birthdays(db: AsyncSession = Depends(get_db)):
+async def upcoming_birthdays(
+    db: AsyncSession = Depends(get_db, scope="function"),
+    redis: Redis = Depends(get_redis),
+):
     """
     Retrieve contacts with upcoming birthdays.
 
+    The serialized response is cached in Redis for the current day and evicted
+    whenever a contact is created, updated or deleted.
+
     Args:
         db (AsyncSession): The database session.
+        redis (Redis): The Redis client.
 
     Returns:
         list[schemas.Contact]: A list of contacts with upcoming birthdays.
     """
+    cached = await crud.get_upcoming_birthdays_from_redis(redis)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
     contacts = await crud.get_contacts_with_upcoming_birthdays(db)
     logger.info("Contacts with upcoming birthdays: %s", contacts)
-    return contacts
+    contacts_json = schemas.ContactListAdapter.dump_json(
+        schemas.ContactListAdapter.validate_python(contacts)
+    )
+    await crud.store_upcoming_birthdays_in_redis(redis, contacts_json)
+    return Response(content=contacts_json, media_type="application/json")
 
 
 # Create the FastAPI app and include the router
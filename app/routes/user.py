@@ -15,18 +15,19 @@ Dependencies:
 """
 
 import os
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File
-from fastapi.security import OAuth2PasswordRequestForm
+import asyncio
+from fastapi import FastAPI, APIRouter, BackgroundTasks, HTTPException, Depends, Response, UploadFile, File
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import async_session
+from app.core.database import get_db
 from app.schemas.user import UserCreate, UserOut, Token, PasswordResetRequest, PasswordReset, Message
-from app.crud.user import get_user_by_email, create_user, get_user_by_email_from_redis, store_in_redis
-from app.core.auth import create_access_token, verify_password, generate_reset_token, verify_reset_token, update_user_password
+from app.crud.user import get_user_by_email, create_user, get_user_cached, get_user_json_from_redis, store_in_redis, delete_from_redis, update_user_avatar
+from app.core.auth import create_access_token, decode_access_token, verify_password_async, hash_password_async, password_needs_rehash, get_dummy_password_hash, generate_reset_token, verify_reset_token, update_user_password
 from dotenv import load_dotenv
-from fastapi.security import OAuth2PasswordBearer
 from app.core.redis import get_redis
+from app.core.ratelimit import rate_limiter
+from app.core.email import send_reset_email
 from redis.asyncio import Redis
-import cloudinary
 import cloudinary.uploader
 import logging
 
@@ -36,20 +37,23 @@ load_dotenv()
 
 router = APIRouter()
 
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-)
+# Read once at import and passed to each upload instead of via global SDK config.
+CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
+CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY")
+CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
+
 
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-async def get_db():
-    async with async_session() as session:
-        yield session
+# Checked before any password hashing or token work runs.
+login_rate_limit = rate_limiter("login")
+password_reset_rate_limit = rate_limiter("password-reset")
 
 
 @router.post("/auth/register", response_model=UserOut, status_code=201)
-async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
+async def register(
+    user: UserCreate, db: AsyncSession = Depends(get_db, scope="function")
+):
     """
     Registers a new user.
 
@@ -71,10 +75,10 @@ async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     new_user = await create_user(db, user)
     return new_user
 
-@router.post("/auth/login", response_model=Token)
+@router.post("/auth/login", response_model=Token, dependencies=[Depends(login_rate_limit)])
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     redis: Redis = Depends(get_redis),
 ):
     """
@@ -89,12 +93,18 @@ async def login(
         Token: The access token and token type.
 
     Raises:
-        HTTPException: If the credentials are invalid.
+        HTTPException: If the credentials are invalid or too many attempts were made.
     """
     user = await get_user_by_email(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    hashed_password = user.hashed_password if user else await get_dummy_password_hash()
+    if not await verify_password_async(form_data.password, hashed_password) or not user:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
-    
+
+    # Hashes made before BCRYPT_ROUNDS changed are upgraded while the password is known.
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password_async(form_data.password)
+        await db.commit()
+
     access_token = create_access_token(data={"sub": user.email})
 
     await store_in_redis(redis, user)
@@ -102,18 +112,40 @@ async def login(
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+async def get_current_user_email(token: str = Depends(oauth2_scheme)) -> str:
+    """
+    Resolves the email of the authenticated user from the bearer token.
+
+    Args:
+        token (str): The OAuth2 token.
+
+    Returns:
+        str: The email stored in the token's subject.
+
+    Raises:
+        HTTPException: If the token is invalid.
+    """
+    payload = decode_access_token(token)
+    if payload is None or "sub" not in payload:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return payload["sub"]
 
 
 @router.get("/auth/me", response_model=UserOut)
 async def read_users_me(
-    token: str = Depends(oauth2_scheme), redis: Redis = Depends(get_redis)
+    email: str = Depends(get_current_user_email),
+    db: AsyncSession = Depends(get_db, scope="function"),
+    redis: Redis = Depends(get_redis),
 ):
     """
     Retrieves the authenticated user's profile.
 
+    A cached profile is already UserOut JSON, so it is returned as is without
+    decoding or re-validating it.
+
     Args:
-        token (str): The OAuth2 token.
+        email (str): The authenticated user's email.
+        db (AsyncSession): The database session.
         redis (Redis): The Redis client.
 
     Returns:
@@ -122,31 +154,30 @@ async def read_users_me(
     Raises:
         HTTPException: If the token is invalid or the user is not found.
     """
-    from app.core.auth import decode_access_token
+    cached = await get_user_json_from_redis(redis, email)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
 
-    payload = decode_access_token(token)
-    if payload is None or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    email = payload["sub"]
-    user = await get_user_by_email_from_redis(redis, email)
+    user = await get_user_by_email(db, email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    await store_in_redis(redis, user)
     return user
 
 
 @router.post("/auth/avatar", response_model=UserOut)
 async def update_avatar(
-    token: str = Depends(oauth2_scheme),
+    emailSub: str = Depends(get_current_user_email),
     email: str = None,
     file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     redis: Redis = Depends(get_redis)
 ):
     """
     Updates the authenticated user's avatar.
 
     Args:
-        token (str): The OAuth2 token.
+        emailSub (str): The authenticated user's email.
         email (str, optional): The user's email. Defaults to None.
         file (UploadFile): The avatar file to upload.
         db (AsyncSession): The database session.
@@ -158,41 +189,54 @@ async def update_avatar(
     Raises:
         HTTPException: If the token is invalid, the user is not found, or the upload fails.
     """
-    from app.core.auth import decode_access_token
-
-    payload = decode_access_token(token)
-    if payload is None or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    emailSub = payload["sub"]
-
     user_email = email or emailSub
 
-    userLoggedIn = await get_user_by_email_from_redis(redis, emailSub)
-    user = await get_user_by_email(db, user_email)
-    
-    if not user:
+    userLoggedIn = await get_user_cached(db, redis, emailSub)
+    if not userLoggedIn:
         raise HTTPException(status_code=404, detail="User not found")
     if not userLoggedIn.role == "admin":
         raise HTTPException(status_code=403, detail="Only admins are allowed to update avatar")
+    # Only an admin editing someone else needs the target looked up separately.
+    if user_email != emailSub and not await get_user_by_email(db, user_email):
+        raise HTTPException(status_code=404, detail="User not found")
 
     try:
-        result = cloudinary.uploader.upload(file.file, folder="avatars")
+        # The SDK does blocking HTTP I/O, so keep it off the event loop.
+        result = await asyncio.to_thread(
+            cloudinary.uploader.upload,
+            file.file,
+            folder="avatars",
+            cloud_name=CLOUDINARY_CLOUD_NAME,
+            api_key=CLOUDINARY_API_KEY,
+            api_secret=CLOUDINARY_API_SECRET,
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Avatar upload failed: {str(e)}")
 
-    user.avatar_url = result.get("secure_url")
-    await db.commit()
-    await db.refresh(user)
+    user = await update_user_avatar(db, user_email, result.get("secure_url"))
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
     await store_in_redis(redis, user)
     return user
 
-@router.post("/auth/request-password-reset", response_model=Message)
-async def request_password_reset(request: PasswordResetRequest, db: AsyncSession = Depends(get_db)):
+@router.post(
+    "/auth/request-password-reset",
+    response_model=Message,
+    dependencies=[Depends(password_reset_rate_limit)],
+)
+async def request_password_reset(
+    request: PasswordResetRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db, scope="function"),
+):
     """
     Requests a password reset link.
 
+    The email is sent in a background task after the response is returned.
+
     Args:
         request (PasswordResetRequest): The password reset request data.
+        background_tasks (BackgroundTasks): Tasks to run after the response is sent.
         db (AsyncSession): The database session.
 
     Returns:
@@ -204,24 +248,39 @@ async def request_password_reset(request: PasswordResetRequest, db: AsyncSession
     
     reset_token = generate_reset_token(request.email)
     
-    print(f"Password reset token for {request.email}: {reset_token}")
+    background_tasks.add_task(send_reset_email, request.email, reset_token)
     return Message(message="If the email exists, a reset link has been sent.")
 
-@router.post("/auth/reset-password", response_model=Message)
-async def reset_password(reset: PasswordReset, db: AsyncSession = Depends(get_db)):
+@router.post(
+    "/auth/reset-password",
+    response_model=Message,
+    dependencies=[Depends(password_reset_rate_limit)],
+)
+async def reset_password(
+    reset: PasswordReset,
+    db: AsyncSession = Depends(get_db, scope="function"),
+    redis: Redis = Depends(get_redis),
+):
     """
     Resets the user's password.
 
     Args:
         reset (PasswordReset): The password reset data.
         db (AsyncSession): The database session.
+        redis (Redis): The Redis client.
 
     Returns:
         Message: A message indicating the password reset was successful.
+
+    Raises:
+        HTTPException: If the reset token is invalid or expired.
     """
     email = verify_reset_token(reset.token)
-    
+    if email is None:
+        raise HTTPException(status_code=400, detail="Invalid or expired reset token")
+
     await update_user_password(db, email, reset.new_password)
+    await delete_from_redis(redis, email)
     
     return Message(message="Password has been reset successfully.")
 
@@ -1,5 +1,6 @@
 from datetime import date
-from pydantic import BaseModel, EmailStr
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, TypeAdapter
 
 
 class ContactBase(BaseModel):
@@ -9,24 +10,27 @@ class ContactBase(BaseModel):
     Attributes:
         first_name (str): The first name of the contact.
         last_name (str): The last name of the contact.
-        email (EmailStr): The email address of the contact.
+        email (str): The email address of the contact, validated when it was written.
         phone (str): The phone number of the contact.
         birthday (date): The birthday of the contact.
         additional_data (str): Additional information about the contact.
     """
     first_name: str
     last_name: str
-    email: EmailStr
+    email: str
     phone: str
     birthday: date
-    additional_data: str = None
+    additional_data: Optional[str] = None
 
 
 class ContactCreate(ContactBase):
     """
     Schema for creating a new contact.
+
+    Attributes:
+        email (EmailStr): The email address of the contact, fully validated on write.
     """
-    pass
+    email: EmailStr
 
 
 class ContactUpdate(BaseModel):
@@ -41,12 +45,14 @@ class ContactUpdate(BaseModel):
         birthday (Optional[date]): The updated birthday of the contact.
         additional_data (Optional[str]): The updated additional information about the contact.
     """
+    # Omitted fields default to None and are left unchanged; an explicit null is
+    # rejected for the NOT NULL columns and clears additional_data.
     first_name: str = None
     last_name: str = None
     email: EmailStr = None
     phone: str = None
     birthday: date = None
-    additional_data: str = None
+    additional_data: Optional[str] = None
 
 
 class Contact(ContactBase):
@@ -58,5 +64,8 @@ class Contact(ContactBase):
     """
     id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Built once at import; validates ORM rows and dumps them straight to JSON bytes.
+ContactListAdapter = TypeAdapter(list[Contact])
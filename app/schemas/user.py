@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from typing import Optional
 
 
@@ -7,9 +7,9 @@ class UserBase(BaseModel):
     Base schema for user-related data.
 
     Attributes:
-        email (EmailStr): The email address of the user.
+        email (str): The email address of the user, validated when it was written.
     """
-    email: EmailStr
+    email: str
 
 
 class UserCreate(UserBase):
@@ -17,8 +17,10 @@ class UserCreate(UserBase):
     Schema for creating a new user.
 
     Attributes:
+        email (EmailStr): The email address of the user, fully validated on registration.
         password (str): The password for the user.
     """
+    email: EmailStr
     password: str
 
 
@@ -39,8 +41,7 @@ class UserOut(UserBase):
     avatar_url: Optional[str] = None
     role: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Token(BaseModel):
@@ -60,15 +61,15 @@ class TokenData(BaseModel):
     Schema for token data.
 
     Attributes:
-        email (Optional[EmailStr]): The email address associated with the token (if any).
+        email (Optional[str]): The email address associated with the token (if any).
     """
-    email: EmailStr | None = None
+    email: str | None = None
     
 class PasswordResetRequest(BaseModel):
     email: EmailStr
 
 class PasswordReset(BaseModel):
-    token: str = Field(..., example="reset-token")
+    token: str = Field(..., examples=["reset-token"])
     new_password: str = Field(..., min_length=8)
 
 class Message(BaseModel):
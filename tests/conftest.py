@@ -1,5 +1,160 @@
 import sys
 import os
+from datetime import date
+from unittest.mock import AsyncMock, Mock
+
+import httpx
+import pytest
+import pytest_asyncio
 
 # Insert the project root into sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.models import Contact
+from app.models.user import User
+
+_UNSET = object()
+
+
+def _make_db(first=_UNSET, all=_UNSET):
+    scalars = Mock()
+    if first is not _UNSET:
+        scalars.first.return_value = first
+    if all is not _UNSET:
+        scalars.all.return_value = all
+    result = Mock()
+    result.scalars.return_value = scalars
+    db = Mock()
+    db.execute = AsyncMock(return_value=result)
+    db.commit = AsyncMock()
+    return db
+
+
+@pytest.fixture(scope="session")
+def make_db():
+    """
+    Build a fake AsyncSession whose execute() result yields the given rows.
+
+    make_db(first=row) serves result.scalars().first() and make_db(all=rows)
+    serves result.scalars().all(); execute and commit are AsyncMocks.
+    """
+    return _make_db
+
+
+@pytest.fixture
+def write_db():
+    """A fake AsyncSession for inserts: add is a Mock, commit and refresh are AsyncMocks."""
+    db = Mock()
+    db.add = Mock()
+    db.commit = AsyncMock()
+    db.refresh = AsyncMock()
+    return db
+
+
+@pytest.fixture(scope="session")
+def fake_contact():
+    """A Contact ORM instance shared by the whole test session."""
+    return Contact(
+        id=1,
+        first_name="John",
+        last_name="Doe",
+        email="john.doe@example.com",
+        phone="123456789",
+        birthday=date(1990, 1, 1),
+        additional_data="Additional info"
+    )
+
+
+@pytest.fixture(scope="session")
+def _contacts_db(fake_contact):
+    return _make_db(all=[fake_contact])
+
+
+@pytest.fixture
+def contacts_db(_contacts_db):
+    """
+    A fake session whose execute() yields [fake_contact], built once per session.
+
+    Call records are cleared before each test; the configured rows are kept.
+    """
+    _contacts_db.execute.reset_mock()
+    _contacts_db.commit.reset_mock()
+    return _contacts_db
+
+
+@pytest.fixture(scope="session")
+def fake_contact_dict():
+    """The JSON form of fake_contact, as returned by the contacts API."""
+    return {
+        "id": 1,
+        "first_name": "John",
+        "last_name": "Doe",
+        "email": "john.doe@example.com",
+        "phone": "123456789",
+        "birthday": "1990-01-01",
+        "additional_data": "Additional info"
+    }
+
+
+@pytest.fixture(scope="session")
+def fake_user():
+    """A regular User ORM instance shared by the whole test session."""
+    return User(
+        id=1,
+        email="user@example.com",
+        hashed_password="fakehashed",
+        role="user",
+        is_active=True,
+        is_verified=False,
+        avatar_url=None
+    )
+
+
+@pytest.fixture(scope="session")
+def fake_admin_user():
+    """An admin User ORM instance shared by the whole test session."""
+    return User(
+        id=2,
+        email="admin@example.com",
+        hashed_password="fakehashed",
+        role="admin",
+        is_active=True,
+        is_verified=False,
+        avatar_url=None
+    )
+
+
+@pytest.fixture(scope="session")
+def fake_redis():
+    """An AsyncMock Redis client on which every cache lookup misses."""
+    redis = AsyncMock()
+    redis.get = AsyncMock(return_value=None)
+    return redis
+
+
+@pytest.fixture(scope="module")
+def app(fake_redis):
+    """
+    The contacts app with Redis replaced by fake_redis.
+
+    Imported here rather than at the top of the test modules, so collecting
+    tests does not build the routers. The override is removed when the module
+    finishes. Modules testing another app override this fixture.
+    """
+    from app.core.redis import get_redis
+    from app.routes.routes import app as contacts_app
+
+    async def override_get_redis():
+        return fake_redis
+
+    contacts_app.dependency_overrides[get_redis] = override_get_redis
+    yield contacts_app
+    contacts_app.dependency_overrides.pop(get_redis, None)
+
+
+@pytest_asyncio.fixture
+async def async_client(app):
+    """An httpx client that calls the module's app in-process on the test's event loop."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
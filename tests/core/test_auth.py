@@ -1,14 +1,25 @@
 # tests/test_auth.py
 import pytest
-from datetime import datetime, timezone
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, Mock, patch
 import app.core.auth as auth  # Import the module so we can override its globals
+from app.models.user import User
 
 # Import the functions to test
 from app.core.auth import (
     verify_password,
     get_password_hash,
+    hash_password_async,
+    verify_password_async,
+    calibrate_bcrypt_rounds,
+    password_needs_rehash,
+    get_dummy_password_hash,
     create_access_token,
     decode_access_token,
+    generate_reset_token,
+    verify_reset_token,
+    update_user_password,
 )
 
 
@@ -28,12 +39,71 @@ def test_password_functions():
     assert verify_password("wrongpassword", hashed) is False
 
 
-def test_create_and_decode_access_token():
-    # Set the module-level variables to known test values.
-    auth.SECRET_KEY = "testsecret"
-    auth.ALGORITHM = "HS256"
-    auth.ACCESS_TOKEN_EXPIRE_MINUTES = 30
+def test_verify_password_malformed_hash():
+    # A stored value that is not a bcrypt hash must not raise.
+    assert verify_password("supersecret", "not-a-bcrypt-hash") is False
 
+
+def test_get_password_hash_uses_configured_rounds(monkeypatch):
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 4)
+
+    hashed = get_password_hash("supersecret")
+
+    # bcrypt encodes the cost right after the version prefix.
+    assert hashed.startswith("$2b$04$")
+    assert verify_password("supersecret", hashed) is True
+
+
+def test_password_needs_rehash(monkeypatch):
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 4)
+
+    assert password_needs_rehash(get_password_hash("supersecret")) is False
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 5)
+    assert password_needs_rehash("$2b$04$" + "a" * 53) is True
+    # Nothing to compare for values that are not bcrypt hashes.
+    assert password_needs_rehash("not-a-bcrypt-hash") is False
+
+
+@pytest.mark.asyncio
+async def test_get_dummy_password_hash_is_reused(monkeypatch):
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 4)
+    monkeypatch.setattr(auth, "_dummy_password_hash", None)
+
+    dummy = await get_dummy_password_hash()
+
+    assert await get_dummy_password_hash() is dummy
+    assert await verify_password_async("supersecret", dummy) is False
+
+
+def test_calibrate_bcrypt_rounds():
+    # An unreachable target falls back to the minimum cost.
+    assert calibrate_bcrypt_rounds(0, min_rounds=4, max_rounds=6) == 4
+    # A generous target picks the highest cost tried.
+    assert calibrate_bcrypt_rounds(10_000, min_rounds=4, max_rounds=5) == 5
+
+
+@pytest.mark.asyncio
+async def test_password_functions_async():
+    password = "supersecret"
+    # Hashing runs in the executor but must produce a hash the sync API accepts.
+    hashed = await hash_password_async(password)
+
+    assert isinstance(hashed, str)
+    assert verify_password(password, hashed) is True
+    assert await verify_password_async(password, hashed) is True
+    assert await verify_password_async("wrongpassword", hashed) is False
+
+
+@pytest.fixture
+def jwt_settings(monkeypatch):
+    """Known signing settings and an empty token cache, all restored after the test."""
+    monkeypatch.setattr(auth, "SECRET_KEY", "testsecret")
+    monkeypatch.setattr(auth, "ALGORITHM", "HS256")
+    monkeypatch.setattr(auth, "ACCESS_TOKEN_EXPIRE_MINUTES", 30)
+    monkeypatch.setattr(auth, "_jwt_cache", OrderedDict())
+
+
+def test_create_and_decode_access_token(jwt_settings):
     # Define payload data.
     data = {"sub": "user@example.com"}
     
@@ -55,17 +125,66 @@ def test_create_and_decode_access_token():
     # Ensure that the expiration timestamp is in the future.
     exp_timestamp = payload["exp"]
     current_ts = datetime.now(timezone.utc).timestamp()
+    assert isinstance(exp_timestamp, int)
     assert exp_timestamp > current_ts
+    assert exp_timestamp <= current_ts + 30 * 60
 
 
-def test_decode_invalid_access_token():
-    # For decoding, we need the same secret and algorithm.
-    auth.SECRET_KEY = "testsecret"
-    auth.ALGORITHM = "HS256"
-    
+def test_decode_invalid_access_token(jwt_settings):
     # Create an invalid token string.
     invalid_token = "invalid.token.string"
     
     # Decoding an invalid token should return None.
     payload = decode_access_token(invalid_token)
     assert payload is None
+
+
+def test_decode_access_token_is_cached(jwt_settings):
+    token = create_access_token({"sub": "cached@example.com"})
+
+    first = decode_access_token(token)
+    # A second decode of the same token must not verify the signature again.
+    with patch.object(auth.jwt, "decode", side_effect=AssertionError):
+        second = decode_access_token(token)
+
+    assert second == first
+
+
+def test_decode_access_token_cache_respects_expiry(jwt_settings):
+    token = create_access_token(
+        {"sub": "expiring@example.com"}, expires_delta=timedelta(minutes=5)
+    )
+    assert decode_access_token(token) is not None
+
+    # Once the token's own expiry passes, the cached payload is discarded.
+    with patch.object(auth.time, "time", return_value=datetime.now(timezone.utc).timestamp() + 600):
+        assert decode_access_token(token) is None
+    assert token not in auth._jwt_cache
+
+
+def test_verify_reset_token():
+    token = generate_reset_token("user@example.com")
+
+    assert verify_reset_token(token) == "user@example.com"
+    # Tampered and expired tokens fail the same way.
+    assert verify_reset_token(token + "x") is None
+    assert verify_reset_token("not-a-token") is None
+    assert verify_reset_token(token, expiration=-1) is None
+
+
+@pytest.mark.asyncio
+async def test_update_user_password_skips_refresh():
+    user = User(id=1, email="user@example.com", hashed_password="old")
+    fake_result = Mock()
+    fake_result.scalars.return_value.first.return_value = user
+    fake_db = Mock()
+    fake_db.execute = AsyncMock(return_value=fake_result)
+    fake_db.commit = AsyncMock()
+    fake_db.refresh = AsyncMock()
+
+    with patch("app.core.auth.hash_password_async", new=AsyncMock(return_value="new")):
+        result = await update_user_password(fake_db, "user@example.com", "newpassword")
+
+    assert result.hashed_password == "new"
+    fake_db.commit.assert_awaited_once()
+    fake_db.refresh.assert_not_awaited()
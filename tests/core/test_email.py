@@ -0,0 +1,30 @@
+import pytest
+from unittest.mock import AsyncMock
+
+import app.core.email as email_module
+from app.core.email import send_reset_email
+
+
+@pytest.mark.asyncio
+async def test_send_reset_email_without_smtp_host(monkeypatch):
+    send = AsyncMock()
+    monkeypatch.setattr(email_module, "SMTP_HOST", None)
+    monkeypatch.setattr(email_module.aiosmtplib, "send", send)
+
+    await send_reset_email("user@example.com", "reset-token")
+
+    send.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_send_reset_email_with_smtp_host(monkeypatch):
+    send = AsyncMock()
+    monkeypatch.setattr(email_module, "SMTP_HOST", "smtp.example.com")
+    monkeypatch.setattr(email_module.aiosmtplib, "send", send)
+
+    await send_reset_email("user@example.com", "reset-token")
+
+    message = send.await_args.args[0]
+    assert message["To"] == "user@example.com"
+    assert "reset-token" in message.get_content()
+    assert send.await_args.kwargs["hostname"] == "smtp.example.com"
@@ -0,0 +1,44 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core.ratelimit import rate_limit
+
+
+def make_request(host="10.0.0.1"):
+    request = Mock()
+    request.client.host = host
+    return request
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_allows_requests_within_limit():
+    fake_redis = Mock()
+    fake_redis.eval = AsyncMock(return_value=5)
+
+    await rate_limit(make_request(), fake_redis, "login", limit=5, window=60)
+
+    args = fake_redis.eval.await_args.args
+    assert args[1:] == (1, "ratelimit:login:10.0.0.1", 60)
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_rejects_requests_over_limit():
+    fake_redis = Mock()
+    fake_redis.eval = AsyncMock(return_value=6)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await rate_limit(make_request(), fake_redis, "login", limit=5, window=60)
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers["Retry-After"] == "60"
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_fails_open_when_redis_is_down():
+    fake_redis = Mock()
+    fake_redis.eval = AsyncMock(side_effect=RedisConnectionError())
+
+    # No exception: requests are let through when the counter is unavailable.
+    await rate_limit(make_request(), fake_redis, "login", limit=5, window=60)
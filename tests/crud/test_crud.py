@@ -1,201 +1,198 @@
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
-from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+from datetime import date
+from pydantic import ValidationError
+from sqlalchemy.orm import raiseload
+from app.crud import crud
 from app.crud.crud import (
     get_contact,
     get_contacts,
     create_contact,
     update_contact,
     delete_contact,
-    search_contacts,
-    get_contacts_with_upcoming_birthdays
+    list_contacts,
+    get_contacts_with_upcoming_birthdays,
+    get_upcoming_birthdays_from_redis,
+    store_upcoming_birthdays_in_redis,
+    delete_upcoming_birthdays_from_redis,
 )
 from app.models.models import Contact
 from app.schemas.schemas import ContactCreate, ContactUpdate
 
-fake_contact = Contact(
-    id=1,
-    first_name="John",
-    last_name="Doe",
-    email="john.doe@example.com",
-    phone="123456789",
-    birthday=date(1990, 1, 1),
-    additional_data="Additional info"
+# Validated once at import; the tests only read them.
+CONTACT_CREATE = ContactCreate(
+    first_name="Alice",
+    last_name="Smith",
+    email="alice.smith@example.com",
+    phone="987654321",
+    birthday=date(1985, 5, 15),
+    additional_data="Data"
+)
+CONTACT_UPDATE = ContactUpdate(first_name="Updated")
+# execute() is mocked, so the birthday never has to fall inside the real window.
+BIRTHDAY_CONTACT = Contact(
+    id=2,
+    first_name="Birthday",
+    last_name="Test",
+    email="birthday.test@example.com",
+    phone="000111222",
+    birthday=date(2000, 1, 4),
+    additional_data="Upcoming"
 )
 
-@pytest.mark.asyncio
-async def test_get_contact_found():
-    fake_scalars = MagicMock()
-    fake_scalars.first.return_value = fake_contact
-
-    fake_result = MagicMock()
-    fake_result.scalars.return_value = fake_scalars
 
-    fake_db = MagicMock()
-    fake_db.execute = AsyncMock(return_value=fake_result)
+class _EagerLambdaStmt:
+    """Stand-in for lambda_stmt that calls each lambda immediately, with no caching."""
 
-    result = await get_contact(fake_db, contact_id=1)
+    def __init__(self, fn):
+        self.statement = fn()
 
-    assert result == fake_contact
+    def __iadd__(self, fn):
+        self.statement = fn(self.statement)
+        return self
 
 
+@pytest.mark.parametrize("found", [True, False])
 @pytest.mark.asyncio
-async def test_get_contact_not_found():
-    fake_scalars = MagicMock()
-    fake_scalars.first.return_value = None
-
-    fake_result = MagicMock()
-    fake_result.scalars.return_value = fake_scalars
+async def test_get_contact(fake_contact, found):
+    expected = fake_contact if found else None
+    fake_db = Mock()
+    fake_db.get = AsyncMock(return_value=expected)
 
-    fake_db = MagicMock()
-    fake_db.execute = AsyncMock(return_value=fake_result)
-
-    result = await get_contact(fake_db, contact_id=999)
+    result = await get_contact(fake_db, contact_id=1)
 
-    assert result is None
+    assert result is expected
+    fake_db.get.assert_awaited_with(Contact, 1)
 
 @pytest.mark.asyncio
-async def test_get_contacts():
+async def test_get_contacts(fake_contact, contacts_db):
     fake_contacts = [fake_contact]
-    fake_scalars = MagicMock()
-    fake_scalars.all.return_value = fake_contacts
-    fake_result = MagicMock()
-    fake_result.scalars.return_value = fake_scalars
-
-    fake_db = MagicMock()
-    fake_db.execute = AsyncMock(return_value=fake_result)
+    fake_db = contacts_db
 
     result = await get_contacts(fake_db, skip=0, limit=100)
     assert result == fake_contacts
 
 @pytest.mark.asyncio
-async def test_create_contact():
-    contact_create = ContactCreate(
-        first_name="Alice",
-        last_name="Smith",
-        email="alice.smith@example.com",
-        phone="987654321",
-        birthday=date(1985, 5, 15),
-        additional_data="Data"
-    )
-    
-    fake_db = MagicMock()
-    fake_db.add = MagicMock()
-    fake_db.commit = AsyncMock()
-    fake_db.refresh = AsyncMock(return_value=None)
+async def test_create_contact(write_db):
+    fake_db = write_db
 
-    result = await create_contact(fake_db, contact_create)
+    result = await create_contact(fake_db, CONTACT_CREATE)
     
-    assert result.first_name == contact_create.first_name
-    assert result.last_name == contact_create.last_name
-    assert result.email == contact_create.email
+    assert result.first_name == CONTACT_CREATE.first_name
+    assert result.last_name == CONTACT_CREATE.last_name
+    assert result.email == CONTACT_CREATE.email
     
     fake_db.add.assert_called_once()  
     fake_db.commit.assert_awaited()
     fake_db.refresh.assert_awaited()
 
+@pytest.mark.parametrize("found", [True, False])
 @pytest.mark.asyncio
-async def test_update_contact():
-    contact_update = ContactUpdate(first_name="Updated")
-
-    fake_db = MagicMock()
-    fake_db.add = MagicMock()
-    fake_db.commit = AsyncMock()
-    fake_db.refresh = AsyncMock(return_value=None)
-
-    fake_scalars = MagicMock()
-    fake_scalars.first.return_value = fake_contact
-    fake_result = MagicMock()
-    fake_result.scalars.return_value = fake_scalars
-    fake_db.execute = AsyncMock(return_value=fake_result)
-
-    result = await update_contact(fake_db, contact_id=1, contact_update=contact_update)
-    assert result.first_name == "Updated"
-    fake_db.add.assert_called_once()
-    fake_db.commit.assert_awaited()
-    fake_db.refresh.assert_awaited()
-
+async def test_update_contact(make_db, found):
+    updated_contact = Contact(
+        id=1,
+        first_name="Updated",
+        last_name="Doe",
+        email="john.doe@example.com",
+        phone="123456789",
+        birthday=date(1990, 1, 1),
+        additional_data="Additional info"
+    ) if found else None
+
+    fake_db = make_db(first=updated_contact)
+
+    result = await update_contact(fake_db, contact_id=1, contact_update=CONTACT_UPDATE)
+    assert result is updated_contact
+    fake_db.execute.assert_awaited_once()
+    # Nothing is committed when no row matched.
+    assert fake_db.commit.await_count == int(found)
+
+@pytest.mark.parametrize("found", [True, False])
 @pytest.mark.asyncio
-async def test_delete_contact():
-    fake_db = MagicMock()
-    fake_db.delete = AsyncMock()
-    fake_db.commit = AsyncMock()
-
-    fake_scalars = MagicMock()
-    fake_scalars.first.return_value = fake_contact
-    fake_result = MagicMock()
-    fake_result.scalars.return_value = fake_scalars
-    fake_db.execute = AsyncMock(return_value=fake_result)
+async def test_delete_contact(fake_contact, make_db, found):
+    expected = fake_contact if found else None
+    fake_db = make_db(first=expected)
 
     result = await delete_contact(fake_db, contact_id=1)
-    assert result == fake_contact
-    fake_db.delete.assert_awaited_with(fake_contact)
-    fake_db.commit.assert_awaited()
+    assert result is expected
+    fake_db.execute.assert_awaited_once()
+    assert fake_db.commit.await_count == int(found)
 
 @pytest.mark.asyncio
-async def test_update_contact2():
-    contact_update = ContactUpdate(first_name="Updated")
+async def test_update_contact_without_changes(fake_contact, monkeypatch):
+    fake_db = Mock()
+    fake_db.execute = AsyncMock()
+    monkeypatch.setattr(crud, "get_contact", AsyncMock(return_value=fake_contact))
 
-    fake_db = MagicMock()
-    fake_db.add = MagicMock()
-    fake_db.commit = AsyncMock()
-    fake_db.refresh = AsyncMock(return_value=None)
+    result = await update_contact(fake_db, contact_id=1, contact_update=ContactUpdate())
+    assert result == fake_contact
+    fake_db.execute.assert_not_awaited()
 
-    with patch('app.crud.crud.get_contact', new_callable=AsyncMock, return_value=fake_contact):
-        result = await update_contact(fake_db, contact_id=1, contact_update=contact_update)
-        assert result.first_name == "Updated"
-        fake_db.add.assert_called_once()
-        fake_db.commit.assert_awaited()
-        fake_db.refresh.assert_awaited()
+def test_contact_update_rejects_null_for_required_fields():
+    # NOT NULL columns cannot be cleared; additional_data can.
+    with pytest.raises(ValidationError):
+        ContactUpdate(first_name=None)
+    assert ContactUpdate(additional_data=None).model_dump(exclude_unset=True) == {
+        "additional_data": None
+    }
 
 @pytest.mark.asyncio
-async def test_delete_contact2():
-    fake_db = MagicMock()
-    fake_db.delete = AsyncMock()
-    fake_db.commit = AsyncMock()
+async def test_update_contact_clears_additional_data(fake_contact, make_db):
+    fake_db = make_db(first=fake_contact)
 
-    with patch('app.crud.crud.get_contact', new_callable=AsyncMock, return_value=fake_contact):
-        result = await delete_contact(fake_db, contact_id=1)
-        assert result == fake_contact
-        fake_db.delete.assert_awaited_with(fake_contact)
-        fake_db.commit.assert_awaited()
+    await update_contact(fake_db, contact_id=1, contact_update=ContactUpdate(additional_data=None))
+
+    stmt = fake_db.execute.await_args.args[0]
+    assert stmt.compile().params["additional_data"] is None
 
 @pytest.mark.asyncio
-async def test_search_contacts():
+async def test_list_contacts_with_filters(fake_contact, contacts_db, monkeypatch):
     fake_contacts = [fake_contact]
-    fake_scalars = MagicMock()
-    fake_scalars.all.return_value = fake_contacts
-    fake_result = MagicMock()
-    fake_result.scalars.return_value = fake_scalars
-
-    fake_db = MagicMock()
-    fake_db.execute = AsyncMock(return_value=fake_result)
-
-    result = await search_contacts(fake_db, first_name="John")
+    fake_db = contacts_db
+    # lambda_stmt only runs its lambdas on a cache miss, so build the statement
+    # directly to see which loader options list_contacts asks for.
+    monkeypatch.setattr(crud, "lambda_stmt", _EagerLambdaStmt)
+    raiseload_spy = Mock(wraps=raiseload)
+    monkeypatch.setattr(crud, "raiseload", raiseload_spy)
+
+    result = await list_contacts(fake_db, skip=0, limit=10, first_name="John")
     assert result == fake_contacts
 
+    # Lazy loads are disabled so serialization cannot issue per-row queries.
+    raiseload_spy.assert_called_once_with("*")
+
 @pytest.mark.asyncio
-async def test_get_contacts_with_upcoming_birthdays():
-    today = datetime.today().date()
-    upcoming_birthday = today + timedelta(days=3)
-    contact_with_birthday = Contact(
-        id=2,
-        first_name="Birthday",
-        last_name="Test",
-        email="birthday.test@example.com",
-        phone="000111222",
-        birthday=upcoming_birthday,
-        additional_data="Upcoming"
-    )
-    fake_contacts = [contact_with_birthday]
-    fake_scalars = MagicMock()
-    fake_scalars.all.return_value = fake_contacts
-    fake_result = MagicMock()
-    fake_result.scalars.return_value = fake_scalars
-
-    fake_db = MagicMock()
-    fake_db.execute = AsyncMock(return_value=fake_result)
+async def test_get_contacts_with_upcoming_birthdays(make_db):
+    fake_contacts = [BIRTHDAY_CONTACT]
+    fake_db = make_db(all=fake_contacts)
 
     result = await get_contacts_with_upcoming_birthdays(fake_db)
     assert result == fake_contacts
 
+
+
+@pytest.mark.asyncio
+async def test_upcoming_birthdays_cache_roundtrip():
+    key = f"contacts:upcoming_birthdays:{date.today().isoformat()}"
+    storage = {}
+
+    async def fake_set(k, value, ex=None):
+        storage[k] = value
+
+    async def fake_get(k):
+        return storage.get(k)
+
+    async def fake_delete(k):
+        storage.pop(k, None)
+
+    fake_redis = Mock()
+    fake_redis.set = fake_set
+    fake_redis.get = fake_get
+    fake_redis.delete = fake_delete
+
+    await store_upcoming_birthdays_in_redis(fake_redis, b"[]")
+    assert storage == {key: b"[]"}
+    assert await get_upcoming_birthdays_from_redis(fake_redis) == b"[]"
+
+    await delete_upcoming_birthdays_from_redis(fake_redis)
+    assert await get_upcoming_birthdays_from_redis(fake_redis) is None
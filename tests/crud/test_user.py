@@ -1,13 +1,23 @@
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
-from sqlalchemy.ext.asyncio import AsyncSession
+from unittest.mock import AsyncMock, Mock
 
 from app.models.user import User
 from app.schemas.user import UserCreate
-from app.crud.user import get_user_by_email, create_user
+from app.crud.user import (
+    get_user_by_email,
+    create_user,
+    update_user_avatar,
+    get_user_cached,
+    get_user_by_email_from_redis,
+    get_user_json_from_redis,
+    store_in_redis,
+)
+
+# Validated once at import; the tests only read it.
+USER_CREATE = UserCreate(email="newuser@example.com", password="secret")
 
 @pytest.mark.asyncio
-async def test_get_user_by_email_found():
+async def test_get_user_by_email_found(make_db):
     fake_user = User(
         email="test@example.com",
         hashed_password="hashed_password",
@@ -15,14 +25,7 @@ async def test_get_user_by_email_found():
         is_verified=False
     )
 
-    fake_scalars = MagicMock()
-    fake_scalars.first.return_value = fake_user
-
-    fake_result = MagicMock()
-    fake_result.scalars.return_value = fake_scalars
-
-    fake_db = MagicMock(spec=AsyncSession)
-    fake_db.execute = AsyncMock(return_value=fake_result)
+    fake_db = make_db(first=fake_user)
 
     result = await get_user_by_email(fake_db, "test@example.com")
 
@@ -30,37 +33,124 @@ async def test_get_user_by_email_found():
 
 
 @pytest.mark.asyncio
-async def test_get_user_by_email_not_found():
-    fake_scalars = MagicMock()
-    fake_scalars.first.return_value = None
-
-    fake_result = MagicMock()
-    fake_result.scalars.return_value = fake_scalars
-
-    fake_db = MagicMock(spec=AsyncSession)
-    fake_db.execute = AsyncMock(return_value=fake_result)
+async def test_get_user_by_email_not_found(make_db):
+    fake_db = make_db(first=None)
 
     result = await get_user_by_email(fake_db, "nonexistent@example.com")
     assert result is None
 
 @pytest.mark.asyncio
-async def test_create_user():
-    user_create = UserCreate(
-        email="newuser@example.com",
-        password="secret"
-    )
-    
-    fake_db = MagicMock(spec=AsyncSession)
-    fake_db.add = MagicMock()
-    fake_db.commit = AsyncMock()
-    fake_db.refresh = AsyncMock()
+async def test_create_user(write_db, monkeypatch):
+    fake_db = write_db
+    monkeypatch.setattr("app.crud.user.hash_password_async", AsyncMock(return_value="fakehashed"))
 
-    with patch("app.crud.user.get_password_hash", return_value="fakehashed"):
-        result = await create_user(fake_db, user_create)
+    result = await create_user(fake_db, USER_CREATE)
 
     fake_db.add.assert_called_once()
     fake_db.commit.assert_awaited()
     fake_db.refresh.assert_awaited()
 
-    assert result.email == user_create.email
+    assert result.email == USER_CREATE.email
     assert result.hashed_password == "fakehashed"
+
+
+@pytest.mark.asyncio
+async def test_update_user_avatar(make_db):
+    fake_user = User(email="test@example.com", hashed_password="hashed_password", avatar_url="url")
+
+    fake_db = make_db(first=fake_user)
+
+    result = await update_user_avatar(fake_db, "test@example.com", "url")
+
+    assert result == fake_user
+    fake_db.execute.assert_awaited_once()
+    fake_db.commit.assert_awaited()
+
+
+@pytest.mark.asyncio
+async def test_update_user_avatar_not_found(make_db):
+    fake_db = make_db(first=None)
+
+    result = await update_user_avatar(fake_db, "missing@example.com", "url")
+
+    assert result is None
+    fake_db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_get_user_cached_hit(monkeypatch):
+    cached_user = User(email="cached@example.com", hashed_password="hashed_password")
+    fake_db = Mock()
+    fake_redis = Mock()
+    db_lookup = AsyncMock()
+    monkeypatch.setattr("app.crud.user.get_user_by_email_from_redis", AsyncMock(return_value=cached_user))
+    monkeypatch.setattr("app.crud.user.get_user_by_email", db_lookup)
+
+    result = await get_user_cached(fake_db, fake_redis, "cached@example.com")
+
+    assert result == cached_user
+    db_lookup.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_get_user_cached_miss_populates_redis(monkeypatch):
+    db_user = User(email="db@example.com", hashed_password="hashed_password")
+    fake_db = Mock()
+    fake_redis = Mock()
+    store = AsyncMock()
+    monkeypatch.setattr("app.crud.user.get_user_by_email_from_redis", AsyncMock(return_value=None))
+    monkeypatch.setattr("app.crud.user.get_user_by_email", AsyncMock(return_value=db_user))
+    monkeypatch.setattr("app.crud.user.store_in_redis", store)
+
+    result = await get_user_cached(fake_db, fake_redis, "db@example.com")
+
+    assert result == db_user
+    store.assert_awaited_once_with(fake_redis, db_user)
+
+
+@pytest.mark.asyncio
+async def test_store_and_get_user_from_redis():
+    user = User(
+        id=1,
+        email="cached@example.com",
+        hashed_password="hashed_password",
+        is_active=True,
+        is_verified=False,
+        avatar_url=None,
+        role="user"
+    )
+    storage = {}
+
+    async def fake_set(key, value, ex=None):
+        storage[key] = value
+
+    async def fake_get(key):
+        return storage.get(key)
+
+    fake_redis = Mock()
+    fake_redis.set = fake_set
+    fake_redis.get = fake_get
+
+    await store_in_redis(fake_redis, user)
+    result = await get_user_by_email_from_redis(fake_redis, "cached@example.com")
+
+    assert isinstance(storage["user:v2:cached@example.com"], bytes)
+    assert b"hashed_password" not in storage["user:v2:cached@example.com"]
+    assert result.id == user.id
+    assert result.email == user.email
+    assert result.role == user.role
+
+
+@pytest.mark.asyncio
+async def test_get_user_json_from_redis_ignores_legacy_entries():
+    # Pre-v2 entries held the full model, password hash included.
+    legacy = b'{"email": "cached@example.com", "hashed_password": "secret-hash"}'
+    storage = {"user:cached@example.com": legacy}
+
+    async def fake_get(key):
+        return storage.get(key)
+
+    fake_redis = Mock()
+    fake_redis.get = fake_get
+
+    assert await get_user_json_from_redis(fake_redis, "cached@example.com") is None
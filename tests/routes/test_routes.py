@@ -1,27 +1,42 @@
-from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock, patch
+import pytest
+from unittest.mock import AsyncMock
 from app.crud import crud
-from app.routes.routes import app
-
-client = TestClient(app)
-
-fake_contact = {
-    "id": 1,
-    "first_name": "John",
-    "last_name": "Doe",
-    "email": "john.doe@example.com",
-    "phone": "123456789",
-    "birthday": "1990-01-01",
-    "additional_data": "Additional info"
+
+# One mock per patched CRUD function, reset before each test instead of rebuilt.
+CRUD_MOCKS = {
+    name: AsyncMock()
+    for name in (
+        "create_contact",
+        "list_contacts",
+        "get_contact",
+        "update_contact",
+        "delete_contact",
+        "get_contacts_with_upcoming_birthdays",
+        "get_upcoming_birthdays_from_redis",
+        "store_upcoming_birthdays_in_redis",
+        "delete_upcoming_birthdays_from_redis",
+    )
 }
 
-def test_read_root():
-    response = client.get("/")
+
+@pytest.fixture(autouse=True)
+def crud_mocks(monkeypatch):
+    for name, mock in CRUD_MOCKS.items():
+        mock.reset_mock(return_value=True, side_effect=True)
+        monkeypatch.setattr(crud, name, mock)
+    # Every cache lookup misses unless a test says otherwise.
+    CRUD_MOCKS["get_upcoming_birthdays_from_redis"].return_value = None
+    return CRUD_MOCKS
+
+@pytest.mark.asyncio
+async def test_read_root(async_client):
+    response = await async_client.get("/")
     assert response.status_code == 200
     data = response.json()
     assert data == {"message": "Welcome to the Contacts API"}
 
-def test_create_contact():
+@pytest.mark.asyncio
+async def test_create_contact(fake_contact_dict, async_client, crud_mocks):
     new_contact_payload = {
         "first_name": "Jane",
         "last_name": "Doe",
@@ -31,80 +46,105 @@ def test_create_contact():
         "additional_data": "New contact"
     }
 
-    with patch.object(crud, "create_contact", new=AsyncMock(return_value=fake_contact)):
-        response = client.post("/contacts/", json=new_contact_payload)
-        assert response.status_code == 200, response.text
-        data = response.json()
-        assert data["id"] == fake_contact["id"]
-        assert data["email"] == fake_contact["email"]
-
-def test_read_contacts_list():
-    with patch.object(crud, "get_contacts", new=AsyncMock(return_value=[fake_contact])):
-        response = client.get("/contacts/?skip=0&limit=100")
-        assert response.status_code == 200, response.text
-        data = response.json()
-        assert isinstance(data, list)
-        assert data[0]["id"] == fake_contact["id"]
-
-def test_read_contacts_search():
-    with patch.object(crud, "search_contacts", new=AsyncMock(return_value=[fake_contact])):
-        response = client.get("/contacts/?first_name=John")
-        assert response.status_code == 200, response.text
-        data = response.json()
-        assert isinstance(data, list)
-        assert data[0]["first_name"] == fake_contact["first_name"]
-
-def test_read_contact_found():
-    with patch.object(crud, "get_contact", new=AsyncMock(return_value=fake_contact)):
-        response = client.get("/contacts/1")
-        assert response.status_code == 200, response.text
-        data = response.json()
-        assert data["id"] == fake_contact["id"]
-
-def test_read_contact_not_found():
-    with patch.object(crud, "get_contact", new=AsyncMock(return_value=None)):
-        response = client.get("/contacts/999")
-        assert response.status_code == 404, response.text
-        data = response.json()
-        assert data["detail"] == "Contact not found"
-
-def test_update_contact_found():
-    updated_contact = fake_contact.copy()
+    crud_mocks["create_contact"].return_value = fake_contact_dict
+    response = await async_client.post("/contacts/", json=new_contact_payload)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["id"] == fake_contact_dict["id"]
+    assert data["email"] == fake_contact_dict["email"]
+
+@pytest.mark.asyncio
+async def test_read_contacts_list(fake_contact_dict, async_client, crud_mocks):
+    list_contacts = crud_mocks["list_contacts"]
+    list_contacts.return_value = [fake_contact_dict]
+    response = await async_client.get("/contacts/?skip=0&limit=100")
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert isinstance(data, list)
+    assert data[0]["id"] == fake_contact_dict["id"]
+    assert list_contacts.await_args.args[1:] == (0, 100, None, None, None)
+
+@pytest.mark.asyncio
+async def test_read_contacts_search(fake_contact_dict, async_client, crud_mocks):
+    list_contacts = crud_mocks["list_contacts"]
+    list_contacts.return_value = [fake_contact_dict]
+    response = await async_client.get("/contacts/?first_name=John&skip=10&limit=5")
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert isinstance(data, list)
+    assert data[0]["first_name"] == fake_contact_dict["first_name"]
+    # Filters and pagination are applied together.
+    assert list_contacts.await_args.args[1:] == (10, 5, "John", None, None)
+
+@pytest.mark.asyncio
+async def test_read_contact_found(fake_contact_dict, async_client, crud_mocks):
+    crud_mocks["get_contact"].return_value = fake_contact_dict
+    response = await async_client.get("/contacts/1")
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["id"] == fake_contact_dict["id"]
+
+@pytest.mark.asyncio
+async def test_update_contact_found(fake_contact_dict, async_client, crud_mocks):
+    updated_contact = fake_contact_dict.copy()
     updated_contact["first_name"] = "UpdatedName"
 
-    with patch.object(crud, "update_contact", new=AsyncMock(return_value=updated_contact)):
-        update_payload = {"first_name": "UpdatedName"}
-        response = client.put("/contacts/1", json=update_payload)
-        assert response.status_code == 200, response.text
-        data = response.json()
-        assert data["first_name"] == "UpdatedName"
-
-def test_update_contact_not_found():
-    with patch.object(crud, "update_contact", new=AsyncMock(return_value=None)):
-        update_payload = {"first_name": "UpdatedName"}
-        response = client.put("/contacts/999", json=update_payload)
-        assert response.status_code == 404, response.text
-        data = response.json()
-        assert data["detail"] == "Contact not found"
-
-def test_delete_contact_found():
-    with patch.object(crud, "delete_contact", new=AsyncMock(return_value=fake_contact)):
-        response = client.delete("/contacts/1")
-        assert response.status_code == 200, response.text
-        data = response.json()
-        assert data["id"] == fake_contact["id"]
-
-def test_delete_contact_not_found():
-    with patch.object(crud, "delete_contact", new=AsyncMock(return_value=None)):
-        response = client.delete("/contacts/999")
-        assert response.status_code == 404, response.text
-        data = response.json()
-        assert data["detail"] == "Contact not found"
-
-def test_upcoming_birthdays():
-    with patch.object(crud, "get_contacts_with_upcoming_birthdays", new=AsyncMock(return_value=[fake_contact])):
-        response = client.get("/contacts/birthdays/upcoming")
-        assert response.status_code == 200, response.text
-        data = response.json()
-        assert isinstance(data, list)
-        assert data[0]["id"] == fake_contact["id"]
+    crud_mocks["update_contact"].return_value = updated_contact
+    update_payload = {"first_name": "UpdatedName"}
+    response = await async_client.put("/contacts/1", json=update_payload)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["first_name"] == "UpdatedName"
+
+@pytest.mark.asyncio
+async def test_delete_contact_found(fake_contact_dict, async_client, crud_mocks):
+    crud_mocks["delete_contact"].return_value = fake_contact_dict
+    response = await async_client.delete("/contacts/1")
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["id"] == fake_contact_dict["id"]
+
+@pytest.mark.parametrize(
+    "crud_function, method, payload",
+    [
+        ("get_contact", "GET", None),
+        ("update_contact", "PUT", {"first_name": "UpdatedName"}),
+        ("delete_contact", "DELETE", None),
+    ],
+)
+@pytest.mark.asyncio
+async def test_contact_not_found(async_client, crud_function, method, payload, crud_mocks):
+    crud_mocks[crud_function].return_value = None
+    response = await async_client.request(method, "/contacts/999", json=payload)
+    assert response.status_code == 404, response.text
+    data = response.json()
+    assert data["detail"] == "Contact not found"
+
+@pytest.mark.asyncio
+async def test_upcoming_birthdays(fake_contact_dict, async_client, crud_mocks):
+    crud_mocks["get_contacts_with_upcoming_birthdays"].return_value = [fake_contact_dict]
+    store = crud_mocks["store_upcoming_birthdays_in_redis"]
+    response = await async_client.get("/contacts/birthdays/upcoming")
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert isinstance(data, list)
+    assert data[0]["id"] == fake_contact_dict["id"]
+    store.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_upcoming_birthdays_cached(async_client, crud_mocks):
+    cached = b'[{"id": 1, "first_name": "John"}]'
+    crud_mocks["get_upcoming_birthdays_from_redis"].return_value = cached
+    query = crud_mocks["get_contacts_with_upcoming_birthdays"]
+    response = await async_client.get("/contacts/birthdays/upcoming")
+    assert response.status_code == 200, response.text
+    assert response.content == cached
+    query.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_delete_contact_evicts_upcoming_birthdays(fake_contact_dict, fake_redis, async_client, crud_mocks):
+    crud_mocks["delete_contact"].return_value = fake_contact_dict
+    evict = crud_mocks["delete_upcoming_birthdays_from_redis"]
+    response = await async_client.delete("/contacts/1")
+    assert response.status_code == 200, response.text
+    evict.assert_awaited_once_with(fake_redis)
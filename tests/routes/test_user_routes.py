@@ -1,104 +1,225 @@
-from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+from unittest.mock import AsyncMock, Mock
+from app.core.database import get_db
 from app.models.user import User
-from app.routes.user import app
-
-client = TestClient(app)
-
-fake_user_obj = User(
-    id=1,
-    email="user@example.com",
-    hashed_password="fakehashed",
-    role="user",
-    is_active=True,
-    is_verified=False,
-    avatar_url=None
-)
-
-fake_admin_user_obj = User(
-    id=2,
-    email="admin@example.com",
-    hashed_password="fakehashed",
-    role="admin",
-    is_active=True,
-    is_verified=False,
-    avatar_url=None
-)
-
-dummy_db = AsyncMock()
-dummy_db.add = MagicMock()
-dummy_db.commit = AsyncMock()
-dummy_db.refresh = AsyncMock()
-
-async def override_get_db():
-    yield dummy_db
-
-def test_register_success():
+
+AUTH_HEADERS = {"Authorization": "Bearer valid.token.here"}
+INVALID_AUTH_HEADERS = {"Authorization": "Bearer invalid.token"}
+AVATAR_FILES = {"file": ("avatar.png", b"image-bytes", "image/png")}
+
+async def skip_rate_limit():
+    return None
+
+@pytest.fixture(scope="module")
+def app():
+    from app.routes.user import app as user_app, login_rate_limit, password_reset_rate_limit
+
+    user_app.dependency_overrides[login_rate_limit] = skip_rate_limit
+    user_app.dependency_overrides[password_reset_rate_limit] = skip_rate_limit
+    yield user_app
+    user_app.dependency_overrides.pop(login_rate_limit, None)
+    user_app.dependency_overrides.pop(password_reset_rate_limit, None)
+
+@pytest.fixture
+def override_db(app, write_db, monkeypatch):
+    """Serve write_db as the route's session; monkeypatch drops the override even if the test fails."""
+    async def override_get_db():
+        yield write_db
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_get_db)
+    return write_db
+
+@pytest.fixture
+def decode_token(monkeypatch):
+    """Replace the route's token decoder; tests set return_value to the payload they need."""
+    decode = Mock()
+    monkeypatch.setattr("app.routes.user.decode_access_token", decode)
+    return decode
+
+@pytest.mark.asyncio
+async def test_register_success(async_client, fake_user, monkeypatch):
     new_user_payload = {
         "email": "newuser@example.com",
         "password": "newpassword"
     }
-    with patch("app.routes.user.get_user_by_email", new=AsyncMock(return_value=None)):
-        with patch("app.routes.user.create_user", new=AsyncMock(return_value=fake_user_obj)):
-            response = client.post("/auth/register", json=new_user_payload)
-            assert response.status_code == 201, response.text
-            data = response.json()
-            assert data["email"] == fake_user_obj.email
-
-def test_register_existing():
+    monkeypatch.setattr("app.routes.user.get_user_by_email", AsyncMock(return_value=None))
+    monkeypatch.setattr("app.routes.user.create_user", AsyncMock(return_value=fake_user))
+    response = await async_client.post("/auth/register", json=new_user_payload)
+    assert response.status_code == 201, response.text
+    data = response.json()
+    assert data["email"] == fake_user.email
+
+@pytest.mark.asyncio
+async def test_register_existing(async_client, fake_user, monkeypatch):
     new_user_payload = {
         "email": "existing@example.com",
         "password": "password123"
     }
-    with patch("app.routes.user.get_user_by_email", new=AsyncMock(return_value=fake_user_obj)):
-        response = client.post("/auth/register", json=new_user_payload)
-        assert response.status_code == 409, response.text
-        data = response.json()
-        assert data["detail"] == "User with this email already exists"
+    monkeypatch.setattr("app.routes.user.get_user_by_email", AsyncMock(return_value=fake_user))
+    response = await async_client.post("/auth/register", json=new_user_payload)
+    assert response.status_code == 409, response.text
+    data = response.json()
+    assert data["detail"] == "User with this email already exists"
+
+@pytest.mark.asyncio
+async def test_login_success(async_client, fake_user, monkeypatch):
+    form_data = {
+        "username": "user@example.com",
+        "password": "correctpassword"
+    }
+    monkeypatch.setattr("app.routes.user.get_user_by_email", AsyncMock(return_value=fake_user))
+    monkeypatch.setattr("app.routes.user.verify_password_async", AsyncMock(return_value=True))
+    monkeypatch.setattr("app.routes.user.create_access_token", Mock(return_value="faketoken"))
+    monkeypatch.setattr("app.routes.user.store_in_redis", AsyncMock(return_value=None))
+    response = await async_client.post("/auth/login", data=form_data)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["access_token"] == "faketoken"
+    assert data["token_type"] == "bearer"
 
-def test_login_success():
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_password_hash(async_client, override_db, monkeypatch):
     form_data = {
         "username": "user@example.com",
         "password": "correctpassword"
     }
-    with patch("app.routes.user.get_user_by_email", new=AsyncMock(return_value=fake_user_obj)):
-        with patch("app.routes.user.verify_password", return_value=True):
-            with patch("app.routes.user.create_access_token", return_value="faketoken"):
-                with patch("app.routes.user.store_in_redis", new=AsyncMock(return_value=None)):
-                    response = client.post("/auth/login", data=form_data)
-                    assert response.status_code == 200, response.text
-                    data = response.json()
-                    assert data["access_token"] == "faketoken"
-                    assert data["token_type"] == "bearer"
-
-def test_login_failure_invalid_credentials():
+    stale_user = User(id=1, email="user@example.com", hashed_password="$2b$04$stale", role="user")
+    monkeypatch.setattr("app.routes.user.get_user_by_email", AsyncMock(return_value=stale_user))
+    monkeypatch.setattr("app.routes.user.verify_password_async", AsyncMock(return_value=True))
+    monkeypatch.setattr("app.routes.user.password_needs_rehash", Mock(return_value=True))
+    monkeypatch.setattr("app.routes.user.hash_password_async", AsyncMock(return_value="$2b$12$fresh"))
+    monkeypatch.setattr("app.routes.user.store_in_redis", AsyncMock(return_value=None))
+    response = await async_client.post("/auth/login", data=form_data)
+    assert response.status_code == 200, response.text
+    assert stale_user.hashed_password == "$2b$12$fresh"
+    override_db.commit.assert_awaited()
+
+@pytest.mark.parametrize("known_user", [False, True])
+@pytest.mark.asyncio
+async def test_login_failure_invalid_credentials(async_client, fake_user, monkeypatch, known_user):
     form_data = {
         "username": "user@example.com",
         "password": "wrongpassword"
     }
-    with patch("app.routes.user.get_user_by_email", new=AsyncMock(return_value=None)):
-        response = client.post("/auth/login", data=form_data)
-        assert response.status_code == 401, response.text
+    user = fake_user if known_user else None
+    monkeypatch.setattr("app.routes.user.get_user_by_email", AsyncMock(return_value=user))
+    verify = AsyncMock(return_value=False)
+    monkeypatch.setattr("app.routes.user.verify_password_async", verify)
+    response = await async_client.post("/auth/login", data=form_data)
+    assert response.status_code == 401, response.text
+    # Unknown emails pay for the same password check as wrong passwords.
+    verify.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_read_users_me_success(async_client, decode_token, fake_user, monkeypatch):
+    payload = {"sub": "user@example.com"}
+    decode_token.return_value = payload
+    monkeypatch.setattr("app.routes.user.get_user_json_from_redis", AsyncMock(return_value=None))
+    monkeypatch.setattr("app.routes.user.get_user_by_email", AsyncMock(return_value=fake_user))
+    store = AsyncMock()
+    monkeypatch.setattr("app.routes.user.store_in_redis", store)
+    response = await async_client.get("/auth/me", headers=AUTH_HEADERS)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["email"] == fake_user.email
+    store.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_read_users_me_cached(async_client, decode_token, monkeypatch):
+    payload = {"sub": "user@example.com"}
+    cached = b'{"email":"user@example.com","id":1,"is_active":true,"is_verified":false,"avatar_url":null,"role":"user"}'
+    decode_token.return_value = payload
+    monkeypatch.setattr("app.routes.user.get_user_json_from_redis", AsyncMock(return_value=cached))
+    db_lookup = AsyncMock()
+    monkeypatch.setattr("app.routes.user.get_user_by_email", db_lookup)
+    response = await async_client.get("/auth/me", headers=AUTH_HEADERS)
+    assert response.status_code == 200, response.text
+    assert response.content == cached
+    db_lookup.assert_not_awaited()
 
-    with patch("app.routes.user.get_user_by_email", new=AsyncMock(return_value=fake_user_obj)):
-        with patch("app.routes.user.verify_password", return_value=False):
-            response = client.post("/auth/login", data=form_data)
-            assert response.status_code == 401, response.text
+@pytest.mark.asyncio
+async def test_read_users_me_invalid_token(async_client, decode_token):
+    decode_token.return_value = None
+    response = await async_client.get("/auth/me", headers=INVALID_AUTH_HEADERS)
+    assert response.status_code == 401, response.text
 
-def test_read_users_me_success():
-    valid_token = "valid.token.here"
+@pytest.mark.asyncio
+async def test_update_avatar_forbidden_for_non_admin(async_client, decode_token, fake_user, monkeypatch):
     payload = {"sub": "user@example.com"}
-    with patch("app.core.auth.decode_access_token", return_value=payload):
-        with patch("app.routes.user.get_user_by_email_from_redis", new=AsyncMock(return_value=fake_user_obj)):
-            headers = {"Authorization": f"Bearer {valid_token}"}
-            response = client.get("/auth/me", headers=headers)
-            assert response.status_code == 200, response.text
-            data = response.json()
-            assert data["email"] == fake_user_obj.email
-
-def test_read_users_me_invalid_token():
-    invalid_token = "invalid.token"
-    with patch("app.core.auth.decode_access_token", return_value=None):
-        headers = {"Authorization": f"Bearer {invalid_token}"}
-        response = client.get("/auth/me", headers=headers)
-        assert response.status_code == 401, response.textpy
+    decode_token.return_value = payload
+    monkeypatch.setattr("app.routes.user.get_user_cached", AsyncMock(return_value=fake_user))
+    db_lookup = AsyncMock()
+    monkeypatch.setattr("app.routes.user.get_user_by_email", db_lookup)
+    response = await async_client.post("/auth/avatar", headers=AUTH_HEADERS, files=AVATAR_FILES)
+    assert response.status_code == 403, response.text
+    db_lookup.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_update_avatar_own_profile(async_client, decode_token, fake_admin_user, monkeypatch):
+    payload = {"sub": "admin@example.com"}
+    updated_admin = User(
+        id=2,
+        email="admin@example.com",
+        hashed_password="fakehashed",
+        role="admin",
+        is_active=True,
+        is_verified=False,
+        avatar_url="https://example.com/avatar.png"
+    )
+    decode_token.return_value = payload
+    monkeypatch.setattr("app.routes.user.get_user_cached", AsyncMock(return_value=fake_admin_user))
+    db_lookup = AsyncMock()
+    monkeypatch.setattr("app.routes.user.get_user_by_email", db_lookup)
+    monkeypatch.setattr("app.routes.user.cloudinary.uploader.upload", Mock(return_value={"secure_url": updated_admin.avatar_url}))
+    update_avatar = AsyncMock(return_value=updated_admin)
+    monkeypatch.setattr("app.routes.user.update_user_avatar", update_avatar)
+    monkeypatch.setattr("app.routes.user.store_in_redis", AsyncMock(return_value=None))
+    response = await async_client.post("/auth/avatar", headers=AUTH_HEADERS, files=AVATAR_FILES)
+    assert response.status_code == 200, response.text
+    assert response.json()["avatar_url"] == updated_admin.avatar_url
+    db_lookup.assert_not_awaited()
+    update_avatar.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_update_avatar_other_user_not_found(async_client, decode_token, fake_admin_user, monkeypatch):
+    payload = {"sub": "admin@example.com"}
+    decode_token.return_value = payload
+    monkeypatch.setattr("app.routes.user.get_user_cached", AsyncMock(return_value=fake_admin_user))
+    monkeypatch.setattr("app.routes.user.get_user_by_email", AsyncMock(return_value=None))
+    upload = Mock()
+    monkeypatch.setattr("app.routes.user.cloudinary.uploader.upload", upload)
+    response = await async_client.post(
+        "/auth/avatar?email=missing@example.com", headers=AUTH_HEADERS, files=AVATAR_FILES
+    )
+    assert response.status_code == 404, response.text
+    upload.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_request_password_reset_sends_email_in_background(async_client, fake_user, monkeypatch):
+    monkeypatch.setattr("app.routes.user.get_user_by_email", AsyncMock(return_value=fake_user))
+    monkeypatch.setattr("app.routes.user.generate_reset_token", Mock(return_value="reset-token"))
+    send_email = AsyncMock()
+    monkeypatch.setattr("app.routes.user.send_reset_email", send_email)
+    response = await async_client.post("/auth/request-password-reset", json={"email": "user@example.com"})
+    assert response.status_code == 200, response.text
+    send_email.assert_awaited_once_with("user@example.com", "reset-token")
+
+@pytest.mark.asyncio
+async def test_request_password_reset_unknown_email(async_client, monkeypatch):
+    monkeypatch.setattr("app.routes.user.get_user_by_email", AsyncMock(return_value=None))
+    send_email = AsyncMock()
+    monkeypatch.setattr("app.routes.user.send_reset_email", send_email)
+    response = await async_client.post("/auth/request-password-reset", json={"email": "nobody@example.com"})
+    assert response.status_code == 200, response.text
+    send_email.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_reset_password_invalid_token(async_client, monkeypatch):
+    payload = {"token": "bad-token", "new_password": "newpassword"}
+    monkeypatch.setattr("app.routes.user.verify_reset_token", Mock(return_value=None))
+    update_password = AsyncMock()
+    monkeypatch.setattr("app.routes.user.update_user_password", update_password)
+    response = await async_client.post("/auth/reset-password", json=payload)
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Invalid or expired reset token"
+    update_password.assert_not_awaited()